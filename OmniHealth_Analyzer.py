@@ -3,13 +3,10 @@ import streamlit
 import datetime
 import plotly.graph_objects as go
 from fpdf import FPDF
-
-PROJECT_ID = "cardiovascular-ai-model"
-REGION = "us-central1"   
-CARDIO_ENDPOINT_ID = "1647445550896775168" 
-METABOLIC_ENDPOINT_ID = "558753117538091008" 
-RENAL_ENDPOINT_ID = "3922942039183851520"
-SYSTEMIC_ENDPOINT_ID = "1707100653773389824"
+from endpoint_config import (
+    PROJECT_ID, REGION, CARDIO_ENDPOINTS, METABOLIC_ENDPOINTS, RENAL_ENDPOINTS, SYSTEMIC_ENDPOINTS, vertex_router
+)
+from approximate_scoring import SCORE_TABLE_GRIDS, SCORE_TABLE_TOLERANCE, approximate_score, load_score_table, score_table_version
 
 cardio_score=0
 metabolic_score=0
@@ -17,21 +14,22 @@ renal_score=0
 
 aiplatform.init(project=PROJECT_ID, location=REGION)
 
-cardioendpoint = aiplatform.Endpoint(
-    endpoint_name=f"projects/{PROJECT_ID}/locations/{REGION}/endpoints/{CARDIO_ENDPOINT_ID}"
-)
+@streamlit.cache_resource
+def endpoint_router(targets):
+    return vertex_router(targets)
 
-metabolicendpoint = aiplatform.Endpoint(
-    endpoint_name=f"projects/{PROJECT_ID}/locations/{REGION}/endpoints/{METABOLIC_ENDPOINT_ID}"
-)
+cardioendpoint = endpoint_router(tuple(CARDIO_ENDPOINTS))
+metabolicendpoint = endpoint_router(tuple(METABOLIC_ENDPOINTS))
+renalendpoint = endpoint_router(tuple(RENAL_ENDPOINTS))
+systemicendpoint = endpoint_router(tuple(SYSTEMIC_ENDPOINTS))
 
-renalendpoint = aiplatform.Endpoint(
-    endpoint_name=f"projects/{PROJECT_ID}/locations/{REGION}/endpoints/{RENAL_ENDPOINT_ID}"
-)
+# keyed on the table files' mtimes so offline rebuilds are picked up without a restart
+@streamlit.cache_resource(max_entries=len(SCORE_TABLE_GRIDS))
+def cached_score_table(name, version):
+    return load_score_table(name)
 
-systemicendpoint = aiplatform.Endpoint(
-    endpoint_name=f"projects/{PROJECT_ID}/locations/{REGION}/endpoints/{SYSTEMIC_ENDPOINT_ID}"
-)
+def score_table(name):
+    return cached_score_table(name, score_table_version(name))
 
 def draw_spider_chart(c, m, r, s):
     line_color = '#007BFF'
@@ -383,7 +381,7 @@ def uric_acid_recommendation(uric_acid):
             "renal and metabolic health."
         )
 
-def cardio_recommendation(sbp, dbp, hr, crp, ldl):
+def cardio_recommendation(sbp, dbp, hr, crp, ldl, approximate=False):
     bp_cat, bp_msg = bp_recommendation(sbp, dbp)
     ldl_cat, ldl_msg = ldl_recommendation(ldl)
     crp_cat, crp_msg = crp_recommendation(crp)
@@ -397,30 +395,27 @@ def cardio_recommendation(sbp, dbp, hr, crp, ldl):
     }]
     
     bounds = {"lower": "N/A", "upper": "N/A"}
-    try:
-        response = cardioendpoint.explain(instances=instances)
-        pred = response.predictions[0]
-        attr_text = get_attr_str(response)
-        if isinstance(pred, dict):
-            bounds["lower"] = pred.get("lower_bound", "N/A")
-            bounds["upper"] = pred.get("upper_bound", "N/A")
-    except Exception:
+    approx = approximate_score(score_table("cardio"), instances[0]) if approximate else None
+    if approx is not None:
+        predicted_score, bounds = approx
+        attr_text = "\nFeature Attribution: Not available (approximate score)"
+    else:
         try:
-            response = cardioendpoint.predict(instances=instances)
+            response, explained = cardioendpoint.explain_or_predict(instances=instances)
             pred = response.predictions[0]
-            attr_text = "\nFeature Attribution: Not available"
+            attr_text = get_attr_str(response) if explained else "\nFeature Attribution: Not available"
             if isinstance(pred, dict):
                 bounds["lower"] = pred.get("lower_bound", "N/A")
                 bounds["upper"] = pred.get("upper_bound", "N/A")
         except Exception as e:
             return "0.0", f"Cardio Endpoint Error: {str(e)}", "Not available", bounds
 
-    predicted_score = pred["value"] if isinstance(pred, dict) else pred
+        predicted_score = pred["value"] if isinstance(pred, dict) else pred
     combined_msg = f"{bp_cat}: {bp_msg}\n{ldl_cat}: {ldl_msg}\n{crp_cat}: {crp_msg}"
     return str(predicted_score), combined_msg, attr_text, bounds
 
 
-def metabolic_recommendation(glucose, hba1c, homa, bmi, waist):
+def metabolic_recommendation(glucose, hba1c, homa, bmi, waist, approximate=False):
     g_cat, glucose_msg = fasting_glucose_recommendation(glucose)
     a_cat, hba1c_msg = hba1c_recommendation(hba1c)
     h_cat, homa_msg = homa_ir_recommendation(homa)
@@ -436,30 +431,27 @@ def metabolic_recommendation(glucose, hba1c, homa, bmi, waist):
     }]
     
     bounds = {"lower": "N/A", "upper": "N/A"}
-    try:
-        response = metabolicendpoint.explain(instances=instances)
-        pred = response.predictions[0]
-        attr_text = get_attr_str(response)
-        if isinstance(pred, dict):
-            bounds["lower"] = pred.get("lower_bound", "N/A")
-            bounds["upper"] = pred.get("upper_bound", "N/A")
-    except Exception:
+    approx = approximate_score(score_table("metabolic"), instances[0]) if approximate else None
+    if approx is not None:
+        predicted_score, bounds = approx
+        attr_text = "\nFeature Attribution: Not available (approximate score)"
+    else:
         try:
-            response = metabolicendpoint.predict(instances=instances)
+            response, explained = metabolicendpoint.explain_or_predict(instances=instances)
             pred = response.predictions[0]
-            attr_text = "\nFeature Attribution: Not available"
+            attr_text = get_attr_str(response) if explained else "\nFeature Attribution: Not available"
             if isinstance(pred, dict):
                 bounds["lower"] = pred.get("lower_bound", "N/A")
                 bounds["upper"] = pred.get("upper_bound", "N/A")
         except Exception as e:
             return "0.0", f"Metabolic Endpoint Error: {str(e)}", "Not available", bounds
 
-    predicted_score = pred["value"] if isinstance(pred, dict) else pred
+        predicted_score = pred["value"] if isinstance(pred, dict) else pred
     combined_msg = f"{g_cat}: {glucose_msg}\n{a_cat}: {hba1c_msg}\n{h_cat}: {homa_msg}\n{b_cat}: {bmi_msg}\n{w_cat}: {waist_msg}"
     return str(predicted_score), combined_msg, attr_text, bounds
 
 
-def renal_recommendation(egfr, scr, ua):
+def renal_recommendation(egfr, scr, ua, approximate=False):
     e_cat, egfr_msg = egfr_recommendation(egfr)
     s_cat, scr_msg = creatinine_recommendation(scr)
     u_cat, ua_msg = uric_acid_recommendation(ua)
@@ -471,36 +463,44 @@ def renal_recommendation(egfr, scr, ua):
     }]
     
     bounds = {"lower": "N/A", "upper": "N/A"}
-    try:
-        response = renalendpoint.explain(instances=instances)
-        pred = response.predictions[0]
-        attr_text = get_attr_str(response)
-        if isinstance(pred, dict):
-            bounds["lower"] = pred.get("lower_bound", "N/A")
-            bounds["upper"] = pred.get("upper_bound", "N/A")
-    except Exception:
+    approx = approximate_score(score_table("renal"), instances[0]) if approximate else None
+    if approx is not None:
+        predicted_score, bounds = approx
+        attr_text = "\nFeature Attribution: Not available (approximate score)"
+    else:
         try:
-            response = renalendpoint.predict(instances=instances)
+            response, explained = renalendpoint.explain_or_predict(instances=instances)
             pred = response.predictions[0]
-            attr_text = "\nFeature Attribution: Not available"
+            attr_text = get_attr_str(response) if explained else "\nFeature Attribution: Not available"
             if isinstance(pred, dict):
                 bounds["lower"] = pred.get("lower_bound", "N/A")
                 bounds["upper"] = pred.get("upper_bound", "N/A")
         except Exception as e:
             return "0.0", f"Renal Endpoint Error: {str(e)}", "Not available", bounds
 
-    predicted_score = pred["value"] if isinstance(pred, dict) else pred
+        predicted_score = pred["value"] if isinstance(pred, dict) else pred
     combined_msg = f"{e_cat}: {egfr_msg}\n{s_cat}: {scr_msg}\n{u_cat}: {ua_msg}"
     return str(predicted_score), combined_msg, attr_text, bounds
 
 
-def health_recommendation(sbp, dbp, hr, crp, ldl, glucose, hba1c, homa, bmi, waist, egfr, scr, ua, smoke, alcohol, pamet, sleep):
-    cs, cardio, c_attr, c_bounds = cardio_recommendation(sbp, dbp, hr, crp, ldl)
-    ms, metabolic, m_attr, m_bounds = metabolic_recommendation(glucose, hba1c, homa, bmi, waist)
-    rs, renal, r_attr, r_bounds = renal_recommendation(egfr, scr, ua)
-    cardiomessage=str(cs)+"\n\n"+cardio
-    metabolicmessage=str(ms)+"\n\n"+metabolic
-    renalmessage=str(rs)+"\n\n"+renal
+def approximate_label(bounds):
+    return " (APPROXIMATE)" if bounds.get("approximate") else ""
+
+def bound_str(bounds):
+    label = "Range From Max Sampled Interpolation Error" if bounds.get("approximate") else "Bound"
+    return f"({label}: {bounds.get('lower', 'N/A')} - {bounds.get('upper', 'N/A')})"
+
+def score_metric_label(bounds):
+    return "APPROXIMATE SCORE" if bounds.get("approximate") else "SCORE"
+
+
+def health_recommendation(sbp, dbp, hr, crp, ldl, glucose, hba1c, homa, bmi, waist, egfr, scr, ua, smoke, alcohol, pamet, sleep, approximate=False):
+    cs, cardio, c_attr, c_bounds = cardio_recommendation(sbp, dbp, hr, crp, ldl, approximate)
+    ms, metabolic, m_attr, m_bounds = metabolic_recommendation(glucose, hba1c, homa, bmi, waist, approximate)
+    rs, renal, r_attr, r_bounds = renal_recommendation(egfr, scr, ua, approximate)
+    cardiomessage=str(cs)+approximate_label(c_bounds)+"\n\n"+cardio
+    metabolicmessage=str(ms)+approximate_label(m_bounds)+"\n\n"+metabolic
+    renalmessage=str(rs)+approximate_label(r_bounds)+"\n\n"+renal
 
     instances = [{
         "Cardio_Score_0_100": str(float(cs)),      
@@ -515,22 +515,14 @@ def health_recommendation(sbp, dbp, hr, crp, ldl, glucose, hba1c, homa, bmi, wai
 
     s_bounds = {"lower": "N/A", "upper": "N/A"}
     try:
-        response = systemicendpoint.explain(instances=instances)
+        response, explained = systemicendpoint.explain_or_predict(instances=instances)
         pred = response.predictions[0]
-        s_attr = get_attr_str(response)
+        s_attr = get_attr_str(response) if explained else "\nFeature Attribution: Not available"
         if isinstance(pred, dict):
             s_bounds["lower"] = pred.get("lower_bound", "N/A")
             s_bounds["upper"] = pred.get("upper_bound", "N/A")
-    except Exception:
-        try:
-            response = systemicendpoint.predict(instances=instances)
-            pred = response.predictions[0]
-            s_attr = "\nFeature Attribution: Not available"
-            if isinstance(pred, dict):
-                s_bounds["lower"] = pred.get("lower_bound", "N/A")
-                s_bounds["upper"] = pred.get("upper_bound", "N/A")
-        except Exception as e:
-            return "0.0", f"Systemic Endpoint Error: {str(e)}", 0, 0, 0, "", "", "", {}, {}, {}, {}
+    except Exception as e:
+        return "0.0", f"Systemic Endpoint Error: {str(e)}", 0, 0, 0, "", "", "", {}, {}, {}, {}
 
     systemic_score = pred["value"] if isinstance(pred, dict) else pred
     
@@ -592,6 +584,16 @@ with col4:
     pamet_value = streamlit.text_input("Physical Activity MET Minutes Per Week", "600")
     sleephrs_value = streamlit.text_input("Sleep Hours", "8")
 
+with streamlit.sidebar:
+    streamlit.subheader("Approximate Scoring")
+    approximate_mode = streamlit.toggle("Approximate organ scores", value=False)
+    streamlit.caption(
+        "Cardio, metabolic and renal scores are interpolated from precomputed tables when inputs fall inside "
+        f"the grid and the max sampled error is within ±{SCORE_TABLE_TOLERANCE}. Otherwise the live endpoint is "
+        "used. The systemic score is always computed by the live endpoint. Tables are built offline with "
+        "`python approximate_scoring.py`."
+    )
+
 streamlit.divider()
 
 if streamlit.button("Run Systemic Analysis", type = "primary", use_container_width=True):
@@ -601,7 +603,8 @@ if streamlit.button("Run Systemic Analysis", type = "primary", use_container_wid
             sbp_value, dbp_value, hr_value, crp_value, ldl_value,
             glucose_value, hba1c_value, homair_value, bmi_value, waist_value,
             egfr_value, sc_value, ua_value, 
-            smoking_value, alcohol_value, pamet_value, sleephrs_value
+            smoking_value, alcohol_value, pamet_value, sleephrs_value,
+            approximate_mode
         )
 
         streamlit.success("Analysis Complete!")
@@ -643,13 +646,13 @@ if streamlit.button("Run Systemic Analysis", type = "primary", use_container_wid
                 clean_line = line.replace('──────────────────────────────────────────────────', '-'*50)
                 
                 if "OVERALL HEALTH SCORE" in clean_line:
-                    pdf.multi_cell(0, 5, txt=f"{clean_line} (Bound: {sb['lower']} - {sb['upper']})".encode('latin-1', 'replace').decode('latin-1'))
+                    pdf.multi_cell(0, 5, txt=f"{clean_line} {bound_str(sb)}".encode('latin-1', 'replace').decode('latin-1'))
                 elif "CARDIO SCORE" in clean_line:
-                    pdf.multi_cell(0, 5, txt=f"{clean_line} (Bound: {cb['lower']} - {cb['upper']})".encode('latin-1', 'replace').decode('latin-1'))
+                    pdf.multi_cell(0, 5, txt=f"{clean_line} {bound_str(cb)}".encode('latin-1', 'replace').decode('latin-1'))
                 elif "METABOLIC SCORE" in clean_line:
-                    pdf.multi_cell(0, 5, txt=f"{clean_line} (Bound: {mb['lower']} - {mb['upper']})".encode('latin-1', 'replace').decode('latin-1'))
+                    pdf.multi_cell(0, 5, txt=f"{clean_line} {bound_str(mb)}".encode('latin-1', 'replace').decode('latin-1'))
                 elif "RENAL SCORE" in clean_line:
-                    pdf.multi_cell(0, 5, txt=f"{clean_line} (Bound: {rb['lower']} - {rb['upper']})".encode('latin-1', 'replace').decode('latin-1'))
+                    pdf.multi_cell(0, 5, txt=f"{clean_line} {bound_str(rb)}".encode('latin-1', 'replace').decode('latin-1'))
                 else:
                     pdf.multi_cell(0, 5, txt=clean_line.encode('latin-1', 'replace').decode('latin-1'))
             
@@ -666,19 +669,19 @@ if streamlit.button("Run Systemic Analysis", type = "primary", use_container_wid
 
         with out_col2:
             streamlit.subheader("Cardiovascular")
-            streamlit.metric("SCORE", round(float(cs)))
+            streamlit.metric(score_metric_label(cb), round(float(cs)))
             formatted_cardio = cardio_msg.replace("\n", "\n\n")
             streamlit.info(formatted_cardio)
 
         with out_col3:
             streamlit.subheader("Metabolic")
-            streamlit.metric("SCORE", round(float(ms)))
+            streamlit.metric(score_metric_label(mb), round(float(ms)))
             formatted_metabolic = metabolic_msg.replace("\n", "\n\n")
             streamlit.info(formatted_metabolic)
 
         with out_col4:
             streamlit.subheader("Renal")
-            streamlit.metric("SCORE", round(float(rs)))
+            streamlit.metric(score_metric_label(rb), round(float(rs)))
             formatted_renal = renal_msg.replace("\n", "\n\n")
             streamlit.info(formatted_renal)
 
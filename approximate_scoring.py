@@ -0,0 +1,153 @@
+import argparse
+import itertools
+import json
+import os
+import numpy as np
+
+SCORE_TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "score_tables")
+SCORE_TABLE_TOLERANCE = 2.0
+SCORE_TABLE_BATCH_SIZE = 500
+SCORE_TABLE_CHECK_POINTS = 200
+
+# (feature, low, high, steps) per organ model, in endpoint feature order
+SCORE_TABLE_GRIDS = {
+    "cardio": [
+        ("SBP_mean", 90.0, 200.0, 6),
+        ("DBP_mean", 50.0, 120.0, 6),
+        ("HR", 40.0, 120.0, 6),
+        ("CRP", 0.0, 10.0, 6),
+        ("LDL", 50.0, 250.0, 6),
+    ],
+    "metabolic": [
+        ("Glucose", 60.0, 250.0, 6),
+        ("HbA1c", 4.0, 12.0, 6),
+        ("HOMA_IR", 0.5, 10.0, 6),
+        ("BMI", 15.0, 50.0, 6),
+        ("Waist", 60.0, 150.0, 6),
+    ],
+    "renal": [
+        ("eGFR", 5.0, 130.0, 12),
+        ("Scr", 0.4, 8.0, 12),
+        ("UA", 2.0, 12.0, 12),
+    ],
+}
+
+def predict_scores(endpoint, rows, fields):
+    scores = []
+    for start in range(0, len(rows), SCORE_TABLE_BATCH_SIZE):
+        batch = rows[start:start + SCORE_TABLE_BATCH_SIZE]
+        instances = [{f: str(float(v)) for f, v in zip(fields, row)} for row in batch]
+        response = endpoint.predict(instances=instances)
+        for pred in response.predictions:
+            scores.append(float(pred["value"] if isinstance(pred, dict) else pred))
+    return scores
+
+def interpolate_score(table, values):
+    axes = table["axes"]
+    grid = table["grid"]
+    lows = []
+    fracs = []
+    for axis, v in zip(axes, values):
+        if not np.isfinite(v) or not axis[0] <= v <= axis[-1]:
+            return None
+        i = min(int(np.searchsorted(axis, v, side="right")) - 1, len(axis) - 2)
+        lows.append(i)
+        fracs.append((v - axis[i]) / (axis[i + 1] - axis[i]))
+
+    cell = np.asarray(grid[tuple(slice(i, i + 2) for i in lows)], dtype=np.float64)
+    for f in fracs:
+        cell = cell[0] * (1.0 - f) + cell[1] * f
+    return float(cell)
+
+def build_score_table(name, endpoint, table_dir=SCORE_TABLE_DIR):
+    spec = SCORE_TABLE_GRIDS[name]
+    fields = [f for f, _, _, _ in spec]
+    axes = [np.linspace(low, high, steps) for _, low, high, steps in spec]
+
+    rows = list(itertools.product(*axes))
+    grid = np.array(predict_scores(endpoint, rows, fields), dtype=np.float32)
+    grid = grid.reshape([len(a) for a in axes])
+
+    # max error at random off-grid points against the live endpoint; an estimate,
+    # not a guaranteed bound, since the model is only checked at these samples
+    rng = np.random.default_rng(0)
+    checks = [tuple(rng.uniform(low, high) for _, low, high, _ in spec) for _ in range(SCORE_TABLE_CHECK_POINTS)]
+    live = predict_scores(endpoint, checks, fields)
+    table = {"axes": axes, "grid": grid}
+    max_error = max(abs(interpolate_score(table, row) - actual) for row, actual in zip(checks, live))
+
+    meta = {"fields": fields, "shape": list(grid.shape), "axes": [a.tolist() for a in axes], "max_error": max_error}
+    grid_path = os.path.join(table_dir, f"{name}.npy")
+    meta_path = os.path.join(table_dir, f"{name}.json")
+    os.makedirs(table_dir, exist_ok=True)
+    with open(grid_path + ".tmp", "wb") as fh:
+        np.save(fh, grid)
+    with open(meta_path + ".tmp", "w") as fh:
+        json.dump(meta, fh)
+    os.replace(grid_path + ".tmp", grid_path)
+    os.replace(meta_path + ".tmp", meta_path)
+    return max_error
+
+def score_table_version(name, table_dir=SCORE_TABLE_DIR):
+    try:
+        return tuple(os.path.getmtime(os.path.join(table_dir, f"{name}{ext}")) for ext in (".npy", ".json"))
+    except OSError:
+        return None
+
+def load_score_table(name, table_dir=SCORE_TABLE_DIR):
+    grid_path = os.path.join(table_dir, f"{name}.npy")
+    meta_path = os.path.join(table_dir, f"{name}.json")
+    if not (os.path.exists(grid_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path) as fh:
+            meta = json.load(fh)
+        axes = [np.array(a) for a in meta["axes"]]
+        grid = np.load(grid_path, mmap_mode="r")
+        shape = tuple(meta["shape"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+    # a grid and sidecar from different builds must not be paired
+    if grid.shape != shape or shape != tuple(len(a) for a in axes) or len(meta["fields"]) != len(axes):
+        return None
+    return {"fields": meta["fields"], "axes": axes, "max_error": float(meta["max_error"]), "grid": grid}
+
+def approximate_score(table, instance, tolerance=SCORE_TABLE_TOLERANCE):
+    if table is None or table["max_error"] > tolerance:
+        return None
+    score = interpolate_score(table, [float(instance[f]) for f in table["fields"]])
+    if score is None:
+        return None
+    max_error = table["max_error"]
+    bounds = {
+        "lower": round(max(0.0, score - max_error), 2),
+        "upper": round(min(100.0, score + max_error), 2),
+        "approximate": True,
+    }
+    return round(score, 2), bounds
+
+def main():
+    from endpoint_config import CARDIO_ENDPOINTS, METABOLIC_ENDPOINTS, RENAL_ENDPOINTS, vertex_router
+
+    targets = {"cardio": CARDIO_ENDPOINTS, "metabolic": METABOLIC_ENDPOINTS, "renal": RENAL_ENDPOINTS}
+    parser = argparse.ArgumentParser(description="Sample the organ endpoints into approximate score tables.")
+    parser.add_argument("models", nargs="*", default=sorted(targets), help="cardio, metabolic and/or renal")
+    parser.add_argument("--table-dir", default=SCORE_TABLE_DIR)
+    args = parser.parse_args()
+    unknown = sorted(set(args.models) - set(targets))
+    if unknown:
+        parser.error(f"unknown models: {', '.join(unknown)}")
+
+    failed = False
+    for name in args.models:
+        try:
+            max_error = build_score_table(name, vertex_router(tuple(targets[name])), args.table_dir)
+            print(f"{name}: max sampled error ±{max_error:.2f}")
+        except Exception as e:
+            print(f"{name}: Score Table Error: {str(e)}")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,25 @@
+from endpoint_router import EndpointRouter
+
+PROJECT_ID = "cardiovascular-ai-model"
+REGION = "us-central1"   
+CARDIO_ENDPOINT_ID = "1647445550896775168" 
+METABOLIC_ENDPOINT_ID = "558753117538091008" 
+RENAL_ENDPOINT_ID = "3922942039183851520"
+SYSTEMIC_ENDPOINT_ID = "1707100653773389824"
+
+# equivalent (region, endpoint_id) replicas per model, add more to route across regions
+CARDIO_ENDPOINTS = [(REGION, CARDIO_ENDPOINT_ID)]
+METABOLIC_ENDPOINTS = [(REGION, METABOLIC_ENDPOINT_ID)]
+RENAL_ENDPOINTS = [(REGION, RENAL_ENDPOINT_ID)]
+SYSTEMIC_ENDPOINTS = [(REGION, SYSTEMIC_ENDPOINT_ID)]
+
+def vertex_router(targets):
+    from google.cloud import aiplatform
+
+    return EndpointRouter([
+        aiplatform.Endpoint(
+            endpoint_name=f"projects/{PROJECT_ID}/locations/{region}/endpoints/{endpoint_id}",
+            location=region
+        )
+        for region, endpoint_id in targets
+    ])
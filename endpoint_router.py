@@ -0,0 +1,127 @@
+import threading
+import time
+
+ROUTER_LATENCY_ALPHA = 0.3
+ROUTER_ERROR_ALPHA = 0.3
+ROUTER_MAX_ERROR_RATE = 0.5
+ROUTER_COOLDOWN_SECONDS = 30.0
+
+ROUTER_METHODS = ("explain", "predict")
+
+class EndpointRouter:
+    def __init__(self, endpoints, latency_alpha=ROUTER_LATENCY_ALPHA, error_alpha=ROUTER_ERROR_ALPHA,
+                 max_error_rate=ROUTER_MAX_ERROR_RATE, cooldown=ROUTER_COOLDOWN_SECONDS, clock=time.monotonic):
+        if not endpoints:
+            raise ValueError("EndpointRouter needs at least one endpoint")
+        self.targets = [
+            {"endpoint": e, "stats": {m: {"latency": None, "error_rate": 0.0, "failed_at": None, "probing": False}
+                                      for m in ROUTER_METHODS}}
+            for e in endpoints
+        ]
+        self.latency_alpha = latency_alpha
+        self.error_alpha = error_alpha
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.clock = clock
+        self.lock = threading.Lock()
+
+    def can_probe(self, stats, now):
+        return not stats["probing"] and now - stats["failed_at"] >= self.cooldown
+
+    def acquire(self, target, method):
+        # an unhealthy method gets a single in-flight probe once its cooldown has passed
+        with self.lock:
+            stats = target["stats"][method]
+            if stats["error_rate"] <= self.max_error_rate:
+                return True
+            if self.can_probe(stats, self.clock()):
+                stats["probing"] = True
+                return True
+            return False
+
+    def served_latency(self, target):
+        # explain_or_predict sends explain while it is healthy on a replica, else predict;
+        # predict latency stands in until explain has succeeded there
+        stats = target["stats"]
+        if stats["explain"]["error_rate"] <= self.max_error_rate and stats["explain"]["latency"] is not None:
+            return stats["explain"]["latency"]
+        return stats["predict"]["latency"]
+
+    def ranked_targets(self, method, latency=None):
+        latency = latency or (lambda t: t["stats"][method]["latency"])
+        with self.lock:
+            now = self.clock()
+            healthy = [t for t in self.targets if t["stats"][method]["error_rate"] <= self.max_error_rate]
+            unhealthy = [t for t in self.targets if t["stats"][method]["error_rate"] > self.max_error_rate]
+            probe = next((t for t in unhealthy if self.can_probe(t["stats"][method], now)), None)
+            if probe is not None:
+                probe["stats"][method]["probing"] = True
+                unhealthy.remove(probe)
+        # unmeasured targets sort first so each replica gets measured once
+        healthy.sort(key=lambda t: latency(t) or 0.0)
+        unhealthy.sort(key=lambda t: t["stats"][method]["error_rate"])
+        # the probe goes first so it is always sent; unhealthy targets are a last resort
+        return ([probe] if probe is not None else []) + healthy + unhealthy
+
+    def record(self, target, method, latency=None):
+        with self.lock:
+            stats = target["stats"][method]
+            if latency is None:
+                stats["error_rate"] += self.error_alpha * (1.0 - stats["error_rate"])
+                stats["failed_at"] = self.clock()
+                return
+            stats["error_rate"] *= 1.0 - self.error_alpha
+            if stats["probing"]:
+                stats["error_rate"] = min(stats["error_rate"], self.max_error_rate)
+            if stats["latency"] is None:
+                stats["latency"] = latency
+            else:
+                stats["latency"] += self.latency_alpha * (latency - stats["latency"])
+
+    def send(self, target, method, **kwargs):
+        start = self.clock()
+        try:
+            result = getattr(target["endpoint"], method)(**kwargs)
+        except Exception:
+            self.record(target, method)
+            raise
+        else:
+            self.record(target, method, self.clock() - start)
+            return result
+        finally:
+            # also clears the probe on BaseException, e.g. Streamlit's rerun and stop signals
+            with self.lock:
+                target["stats"][method]["probing"] = False
+
+    def call(self, method, **kwargs):
+        last_error = None
+        for target in self.ranked_targets(method):
+            try:
+                return self.send(target, method, **kwargs)
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    def explain(self, **kwargs):
+        return self.call("explain", **kwargs)
+
+    def predict(self, **kwargs):
+        return self.call("predict", **kwargs)
+
+    def explain_or_predict(self, **kwargs):
+        # replica health comes from predict, which every replica serves, and the order
+        # from the latency of the method actually sent; a failed explain falls back to
+        # predict on the same replica before failing over
+        last_error = None
+        for target in self.ranked_targets("predict", self.served_latency):
+            # a replica on a predict probe goes straight to predict so the probe is sent
+            if not target["stats"]["predict"]["probing"] and self.acquire(target, "explain"):
+                try:
+                    return self.send(target, "explain", **kwargs), True
+                except Exception as e:
+                    last_error = e
+            try:
+                return self.send(target, "predict", **kwargs), False
+            except Exception as e:
+                last_error = e
+        raise last_error
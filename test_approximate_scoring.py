@@ -0,0 +1,95 @@
+import json
+
+import numpy as np
+import pytest
+
+from approximate_scoring import approximate_score, build_score_table, load_score_table, score_table_version
+
+
+class Response:
+    def __init__(self, predictions):
+        self.predictions = predictions
+
+
+class StandInEndpoint:
+    def __init__(self, score):
+        self.score = score
+        self.calls = 0
+
+    def predict(self, instances):
+        self.calls += 1
+        return Response([{"value": self.score(float(i["eGFR"]), float(i["Scr"]), float(i["UA"]))} for i in instances])
+
+
+def multilinear(egfr, scr, ua):
+    return 0.2 * egfr + 3.0 * scr + 0.5 * scr * ua
+
+
+def curved(egfr, scr, ua):
+    return egfr ** 2 / 200.0
+
+
+def instance(egfr, scr, ua):
+    return {"eGFR": str(egfr), "Scr": str(scr), "UA": str(ua)}
+
+
+def test_interpolates_multilinear_model_exactly(tmp_path):
+    max_error = build_score_table("renal", StandInEndpoint(multilinear), tmp_path)
+    table = load_score_table("renal", tmp_path)
+
+    assert max_error == pytest.approx(0.0, abs=1e-3)
+    assert isinstance(table["grid"], np.memmap)
+    score, bounds = approximate_score(table, instance(77.3, 1.1, 6.2))
+    assert score == pytest.approx(multilinear(77.3, 1.1, 6.2), abs=0.01)
+    assert bounds["approximate"]
+
+
+def test_falls_back_outside_grid_or_for_non_finite_input(tmp_path):
+    build_score_table("renal", StandInEndpoint(multilinear), tmp_path)
+    table = load_score_table("renal", tmp_path)
+
+    assert approximate_score(table, instance(150, 1.0, 5.0)) is None
+    assert approximate_score(table, instance(90, 0.1, 5.0)) is None
+    assert approximate_score(table, instance("nan", 1.0, 5.0)) is None
+    assert approximate_score(table, instance("inf", 1.0, 5.0)) is None
+
+
+def test_falls_back_above_tolerance(tmp_path):
+    max_error = build_score_table("renal", StandInEndpoint(curved), tmp_path)
+    table = load_score_table("renal", tmp_path)
+
+    assert approximate_score(table, instance(77.3, 1.1, 6.2), tolerance=max_error / 2) is None
+    assert approximate_score(table, instance(77.3, 1.1, 6.2), tolerance=max_error) is not None
+
+
+def test_bounds_are_clamped_to_score_range(tmp_path):
+    build_score_table("renal", StandInEndpoint(lambda egfr, scr, ua: min(100.0, egfr)), tmp_path)
+    table = load_score_table("renal", tmp_path)
+
+    score, bounds = approximate_score(table, instance(110, 1.0, 5.0), tolerance=100.0)
+    assert score == pytest.approx(100.0)
+    assert bounds["upper"] == 100.0
+    assert 0.0 <= bounds["lower"] < 100.0
+
+
+def test_missing_table_is_not_loaded(tmp_path):
+    assert load_score_table("renal", tmp_path) is None
+    assert score_table_version("renal", tmp_path) is None
+
+
+def test_rejects_mismatched_sidecar(tmp_path):
+    build_score_table("renal", StandInEndpoint(multilinear), tmp_path)
+    meta_path = tmp_path / "renal.json"
+    meta = json.loads(meta_path.read_text())
+    meta["shape"] = [6, 6, 6]
+    meta["axes"] = [axis[:6] for axis in meta["axes"]]
+    meta_path.write_text(json.dumps(meta))
+
+    assert load_score_table("renal", tmp_path) is None
+
+
+def test_rejects_mismatched_grid(tmp_path):
+    build_score_table("renal", StandInEndpoint(multilinear), tmp_path)
+    np.save(tmp_path / "renal.npy", np.zeros((6, 6, 6), dtype=np.float32))
+
+    assert load_score_table("renal", tmp_path) is None
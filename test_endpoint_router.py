@@ -0,0 +1,149 @@
+import pytest
+
+from endpoint_router import EndpointRouter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StandInEndpoint:
+    def __init__(self, name, clock, latency, fail_predict=False, fail_explain=False):
+        self.name = name
+        self.clock = clock
+        self.latency = latency
+        self.fail_predict = fail_predict
+        self.fail_explain = fail_explain
+        self.calls = []
+
+    def serve(self, method, failing, latency):
+        self.calls.append(method)
+        self.clock.now += latency
+        if failing:
+            raise RuntimeError(f"{self.name} {method} failed")
+        return f"{self.name}:{method}"
+
+    def predict(self, instances):
+        return self.serve("predict", self.fail_predict, self.latency)
+
+    def explain(self, instances):
+        return self.serve("explain", self.fail_explain, self.latency * 3)
+
+
+def make_router(*specs, cooldown=30.0):
+    clock = FakeClock()
+    endpoints = [StandInEndpoint(name, clock, latency, **kw) for name, latency, kw in specs]
+    return EndpointRouter(endpoints, cooldown=cooldown, clock=clock), clock, endpoints
+
+
+def test_routes_to_fastest_replica():
+    router, _, (slow, fast) = make_router(("slow", 0.5, {}), ("fast", 0.1, {}))
+    results = [router.predict(instances=[]) for _ in range(5)]
+    assert results[-3:] == ["fast:predict"] * 3
+    assert len(slow.calls) == 1
+
+
+def test_fails_over_to_next_replica():
+    router, _, (bad, good) = make_router(("bad", 0.1, {"fail_predict": True}), ("good", 0.5, {}))
+    assert router.predict(instances=[]) == "good:predict"
+    assert router.predict(instances=[]) == "good:predict"
+    assert router.predict(instances=[]) == "good:predict"
+    # two failures push the bad replica over the error threshold, so it is no longer tried
+    assert bad.calls == ["predict", "predict"]
+
+
+def test_raises_last_error_when_every_replica_fails():
+    router, _, _ = make_router(("a", 0.1, {"fail_predict": True}), ("b", 0.1, {"fail_predict": True}))
+    with pytest.raises(RuntimeError):
+        router.predict(instances=[])
+
+
+def test_explain_failure_falls_back_to_predict_on_same_replica():
+    router, _, (a, b) = make_router(("a", 0.1, {"fail_explain": True}), ("b", 0.2, {"fail_explain": True}))
+    results = [router.explain_or_predict(instances=[]) for _ in range(6)]
+    # each replica is measured once, then the faster one serves every call
+    assert results == [("a:predict", False), ("b:predict", False)] + [("a:predict", False)] * 4
+    assert b.calls == ["explain", "predict"]
+    # explain stops being attempted once it is marked down, predict stays healthy
+    assert a.calls.count("explain") == 2
+    assert a.calls.count("predict") == 5
+    for target in router.targets:
+        assert target["stats"]["predict"]["error_rate"] == 0.0
+
+
+def test_explain_or_predict_prefers_explain():
+    router, _, _ = make_router(("a", 0.1, {}))
+    assert router.explain_or_predict(instances=[]) == ("a:explain", True)
+
+
+def test_explain_or_predict_routes_to_fastest_replica():
+    router, _, (slow, fast) = make_router(("slow", 0.5, {}), ("fast", 0.1, {}))
+    results = [router.explain_or_predict(instances=[]) for _ in range(6)]
+    assert results[-4:] == [("fast:explain", True)] * 4
+    assert slow.calls == ["explain"]
+
+
+def test_explain_or_predict_moves_away_from_replica_that_slows_down():
+    router, _, (a, b) = make_router(("a", 0.1, {}), ("b", 0.5, {}))
+    for _ in range(3):
+        router.explain_or_predict(instances=[])
+    assert router.explain_or_predict(instances=[]) == ("a:explain", True)
+
+    a.latency = 10.0
+    router.explain_or_predict(instances=[])
+    assert [router.explain_or_predict(instances=[]) for _ in range(3)] == [("b:explain", True)] * 3
+
+
+def test_latency_is_tracked_per_method():
+    router, _, _ = make_router(("a", 0.1, {}))
+    router.explain(instances=[])
+    router.predict(instances=[])
+    stats = router.targets[0]["stats"]
+    assert stats["explain"]["latency"] == pytest.approx(0.3)
+    assert stats["predict"]["latency"] == pytest.approx(0.1)
+
+
+def test_single_probe_after_cooldown_restores_replica():
+    router, clock, (flaky, backup) = make_router(
+        ("flaky", 0.1, {"fail_predict": True}), ("backup", 0.5, {}), cooldown=10.0
+    )
+    router.predict(instances=[])
+    router.predict(instances=[])
+    assert flaky.calls == ["predict", "predict"]
+
+    router.predict(instances=[])
+    assert len(flaky.calls) == 2
+
+    flaky.fail_predict = False
+    clock.now += 10.0
+    targets = router.ranked_targets("predict")
+    assert targets[0]["endpoint"] is flaky
+    # while the probe is in flight no other call is granted one
+    assert [t["endpoint"] for t in router.ranked_targets("predict")] == [backup, flaky]
+
+    assert router.send(targets[0], "predict", instances=[]) == "flaky:predict"
+    stats = router.targets[0]["stats"]["predict"]
+    assert not stats["probing"]
+    assert stats["error_rate"] <= router.max_error_rate
+    assert router.predict(instances=[]) == "flaky:predict"
+
+
+def test_probe_is_released_when_call_is_interrupted():
+    router, clock, (flaky,) = make_router(("flaky", 0.1, {"fail_predict": True}), cooldown=10.0)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            router.predict(instances=[])
+
+    def interrupted(instances):
+        raise KeyboardInterrupt
+
+    flaky.predict = interrupted
+    clock.now += 10.0
+    with pytest.raises(KeyboardInterrupt):
+        router.predict(instances=[])
+    assert not router.targets[0]["stats"]["predict"]["probing"]
+    assert router.ranked_targets("predict")[0]["stats"]["predict"]["probing"]